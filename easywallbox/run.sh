@@ -6,6 +6,7 @@ export MQTT_HOST=$(bashio::config 'mqtt_host')
 export MQTT_PORT=$(bashio::config 'mqtt_port')
 export MQTT_USERNAME=$(bashio::config 'mqtt_username')
 export MQTT_PASSWORD=$(bashio::config 'mqtt_password')
+export LEGACY_DISCOVERY=$(bashio::config 'legacy_discovery')
 
 echo "Starting EasyWallbox..."
 python3 -m src.main
@@ -2,7 +2,8 @@
 import asyncio
 import logging
 from bleak import BleakClient, BleakError
-from typing import Callable, Optional
+from bleak.backends.characteristic import BleakGATTCharacteristic
+from typing import Callable, Optional, Union
 from .config import Config
 from .bluetoothCommands import (
     WALLBOX_RX, WALLBOX_TX, WALLBOX_ST, 
@@ -12,55 +13,123 @@ from .bluetoothCommands import (
 
 log = logging.getLogger(__name__)
 
+# Reconnect backoff (seconds): doubles after each failed attempt
+RECONNECT_DELAY_MIN = 1.0
+RECONNECT_DELAY_MAX = 60.0
+
+# Replies that end protocol authentication
+AUTH_OK = WALLBOX_ANSWERS["ANSWER_AUTHOK"].strip()
+AUTH_FAILED = frozenset((WALLBOX_ANSWERS["ANSWER_AUTHFAIL"].strip(), WALLBOX_ANSWERS["ANSWER_ERRAUTH"].strip()))
+AUTH_TIMEOUT = 2.0
+
+class AuthenticationError(Exception):
+    """The Wallbox rejected the login."""
+
+class LineBuffer:
+    """Accumulates notification fragments and emits each complete line."""
+    __slots__ = ("_buf", "_on_line")
+
+    def __init__(self, on_line: Callable[[str], None]):
+        self._buf = bytearray()
+        self._on_line = on_line
+
+    def feed(self, data: bytes | bytearray):
+        """Append a fragment and emit any lines it completes."""
+        buf = self._buf
+        buf.extend(data)
+        
+        # Decode only complete lines; a multi-byte character may be split across packets
+        idx = buf.find(b"\n")
+        while idx != -1:
+            line = buf[:idx + 1].decode('utf-8', 'ignore')
+            del buf[:idx + 1]
+            self._on_line(line)
+            idx = buf.find(b"\n")
+
 class BLEManager:
     def __init__(self, config: Config, on_notify_callback: Callable[[str], None], on_connection_change_callback: Optional[Callable[[bool], None]] = None):
         self._config = config
+        self._address = config.wallbox_address
+        self._pin = config.wallbox_pin
         self._on_notify_callback = on_notify_callback
         self._on_connection_change_callback = on_connection_change_callback
         self._client: Optional[BleakClient] = None
         self._running = False
-        self._notification_buffer_rx = ""
-        self._notification_buffer_st = ""
+        self._reconnect_delay = RECONNECT_DELAY_MIN
+        self._auth_cmd = login(self._pin)
+        # Resolved GATT characteristics (fall back to UUIDs until connected)
+        self._rx_char: Union[BleakGATTCharacteristic, str] = WALLBOX_RX
+        self._tx_char: Union[BleakGATTCharacteristic, str] = WALLBOX_TX
+        self._st_char: Union[BleakGATTCharacteristic, str] = WALLBOX_ST
+        self._st_ready = asyncio.Event()
+        self._auth_done = asyncio.Event()
+        self._auth_rejected: Optional[str] = None
+        self._disconnected = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._rx_buffer = LineBuffer(self._on_rx_line)
+        self._st_buffer = LineBuffer(self._on_st_line)
+        self._rx_queue: asyncio.Queue[str] = asyncio.Queue()
+        self._rx_consumer: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
 
     async def start(self):
         """Start the BLE connection loop."""
         self._running = True
+        self._stopping.clear()
+        if self._on_notify_callback and self._rx_consumer is None:
+            self._rx_consumer = asyncio.create_task(self._consume_notifications())
         while self._running:
             try:
-                log.info(f"Connecting to Wallbox at {self._config.wallbox_address}...")
-                self._client = BleakClient(self._config.wallbox_address)
+                log.info("Connecting to Wallbox at %s...", self._address)
+                # Keep one client for the lifetime of the manager; Bleak supports reconnecting it
+                if self._client is None:
+                    self._client = BleakClient(self._address, disconnected_callback=self._on_disconnect)
                 
+                self._disconnected.clear()
                 await self._client.connect()
-                log.info(f"Connected to Wallbox: {self._client.is_connected}")
+                log.info("Connected to Wallbox: %s", self._client.is_connected)
+                self._resolve_characteristics()
 
                 # Start Notifications BEFORE auth to receive auth response
-                await self._client.start_notify(WALLBOX_TX, self._notification_handler_rx)
+                self._st_ready.clear()
+                await self._client.start_notify(self._tx_char, self._notification_handler_rx)
                 log.info("TX NOTIFY STARTED")
-                await self._client.start_notify(WALLBOX_ST, self._notification_handler_st)
+                await self._client.start_notify(self._st_char, self._notification_handler_st)
                 log.info("ST NOTIFY STARTED")
 
-                # Protocol Authentication
-                log.info("Waiting 1s before authentication...")
-                await asyncio.sleep(1)
+                # Protocol Authentication: go as soon as the Wallbox reports on ST,
+                # waiting at most 1s as before
+                try:
+                    await asyncio.wait_for(self._st_ready.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    log.debug("No ST notification before authentication")
                 await self._authenticate()
                 
-                # Give authentication time to process (Wallbox may send response)
-                await asyncio.sleep(2)
+                # Wait for the Wallbox to answer the login (at most 2s, as before)
+                try:
+                    await asyncio.wait_for(self._auth_done.wait(), timeout=AUTH_TIMEOUT)
+                except asyncio.TimeoutError:
+                    log.debug("No authentication reply from Wallbox")
+                if self._auth_rejected:
+                    raise AuthenticationError(self._auth_rejected)
                 
                 # Mark as online only after successful authentication
                 if self._on_connection_change_callback:
                     await self._on_connection_change_callback(True)
+                self._reconnect_delay = RECONNECT_DELAY_MIN
 
-                # Monitor connection
-                while self._running and self._client.is_connected:
-                    await asyncio.sleep(1)
+                # Monitor connection until Bleak reports a disconnect (or stop() is called)
+                if self._client.is_connected:
+                    await self._disconnected.wait()
 
+            except AuthenticationError as e:
+                log.error("Wallbox rejected authentication: %s", e)
             except asyncio.TimeoutError:
                 log.error("BLE Operation Timed Out")
             except BleakError as e:
-                log.error(f"BLE Connection error: {e}")
+                log.error("BLE Connection error: %s", e)
             except Exception as e:
-                log.error(f"Unexpected BLE error: {e}")
+                log.error("Unexpected BLE error: %s", e)
             finally:
                 if self._on_connection_change_callback:
                     await self._on_connection_change_callback(False)
@@ -70,81 +139,108 @@ class BLEManager:
                         await self._client.disconnect()
                     except:
                         pass
-                self._client = None
                 
                 if self._running:
-                    log.info("Waiting 5 seconds before reconnecting BLE...")
-                    await asyncio.sleep(5)
+                    log.info("Waiting %g seconds before reconnecting BLE...", self._reconnect_delay)
+                    # stop() cuts the wait short
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=self._reconnect_delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._reconnect_delay = min(self._reconnect_delay * 2, RECONNECT_DELAY_MAX)
+
+    def _on_disconnect(self, client: BleakClient):
+        """Called by Bleak when the Wallbox connection drops."""
+        log.info("Wallbox disconnected")
+        self._disconnected.set()
+
+    def _resolve_characteristics(self):
+        """Look up the RX/TX/ST characteristics once per connection."""
+        services = self._client.services
+        self._rx_char = services.get_characteristic(WALLBOX_RX) or WALLBOX_RX
+        self._tx_char = services.get_characteristic(WALLBOX_TX) or WALLBOX_TX
+        self._st_char = services.get_characteristic(WALLBOX_ST) or WALLBOX_ST
 
     async def _authenticate(self):
         """Perform protocol-level authentication."""
-        log.info(f"Authenticating with PIN: {self._config.wallbox_pin}")
-        auth_cmd = login(self._config.wallbox_pin)
-        await self.write(auth_cmd)
+        log.info("Authenticating with PIN: %s", self._pin)
+        self._auth_done.clear()
+        self._auth_rejected = None
+        await self._write_raw(self._auth_cmd)
         log.info("Authentication command sent")
 
     async def write(self, data: str | bytes):
         """Write data to the Wallbox."""
+        if isinstance(data, str):
+            data = data.encode('ascii')
+        await self._write_raw(data)
+
+    async def _write_raw(self, data: bytes):
+        """Write already encoded data to the Wallbox."""
         if not self._client or not self._client.is_connected:
             log.warning("Cannot write to BLE: Not connected")
             return
 
-        if isinstance(data, str):
-            data = bytearray(data, 'utf-8')
-        
         try:
-            log.debug(f"Writing to BLE: {data}")
+            log.debug("Writing to BLE: %s", data)
             # Add timeout to prevent hanging
-            async with asyncio.timeout(5.0):
-                await self._client.write_gatt_char(WALLBOX_RX, data, response=False)
+            # Serialize writes so overlapping GATT operations don't collide
+            async with self._write_lock, asyncio.timeout(5.0):
+                await self._client.write_gatt_char(self._rx_char, data, response=False)
         except asyncio.TimeoutError:
             log.error("BLE Write Timed Out")
             raise
         except Exception as e:
-            log.error(f"BLE Write Failed: {e}")
+            log.error("BLE Write Failed: %s", e)
             raise
 
     def _notification_handler_rx(self, sender, data):
         """Handle RX notifications."""
-        try:
-            decoded = data.decode('utf-8')
-            log.debug(f"RAW RX DATA: {repr(decoded)}")
-            self._notification_buffer_rx += decoded
-        except UnicodeDecodeError as e:
-            log.error(f"Failed to decode BLE data: {e}")
-            self._notification_buffer_rx = ""  # Discard corrupt data
-            return
-        
-        if "\n" in self._notification_buffer_rx:
-            log.debug(f"RX Notification: {self._notification_buffer_rx.strip()}")
-            if self._on_notify_callback:
-                # Schedule async callback and track exceptions
-                task = asyncio.create_task(self._on_notify_callback(self._notification_buffer_rx))
-                task.add_done_callback(self._handle_callback_exception)
-            self._notification_buffer_rx = ""
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("RAW RX DATA: %r", bytes(data))
+        self._rx_buffer.feed(data)
+
+    def _on_rx_line(self, line: str):
+        """Forward a complete RX line to the notification consumer."""
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("RX Notification: %s", line.strip())
+        if not self._auth_done.is_set():
+            answer = line.strip()
+            if answer == AUTH_OK:
+                log.info("Authenticated with Wallbox")
+                self._auth_done.set()
+            elif answer in AUTH_FAILED:
+                self._auth_rejected = answer
+                self._auth_done.set()
+        if self._on_notify_callback:
+            self._rx_queue.put_nowait(line)
     
-    def _handle_callback_exception(self, task):
-        """Handle exceptions from notification callbacks."""
-        try:
-            task.result()
-        except Exception as e:
-            log.error(f"Error in notification callback: {e}", exc_info=True)
+    async def _consume_notifications(self):
+        """Deliver received lines to the notification callback, in order."""
+        while True:
+            line = await self._rx_queue.get()
+            try:
+                await self._on_notify_callback(line)
+            except Exception as e:
+                log.error("Error in notification callback: %s", e, exc_info=True)
 
     def _notification_handler_st(self, sender, data):
         """Handle ST notifications."""
-        try:
-            self._notification_buffer_st += data.decode('utf-8')
-        except UnicodeDecodeError as e:
-            log.error(f"Failed to decode ST data: {e}")
-            self._notification_buffer_st = ""
-            return
-        
-        if "\n" in self._notification_buffer_st:
-            log.debug(f"ST Notification: {self._notification_buffer_st.strip()}")
-            # Currently we don't do anything with ST notifications other than log
-            # But we could forward them if needed.
-            self._notification_buffer_st = ""
+        self._st_ready.set()
+        self._st_buffer.feed(data)
+
+    def _on_st_line(self, line: str):
+        """Handle a complete ST line."""
+        # Currently we don't do anything with ST notifications other than log
+        # But we could forward them if needed.
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("ST Notification: %s", line.strip())
 
     def stop(self):
         """Stop the BLE manager."""
         self._running = False
+        self._stopping.set()
+        self._disconnected.set()
+        if self._rx_consumer:
+            self._rx_consumer.cancel()
+            self._rx_consumer = None
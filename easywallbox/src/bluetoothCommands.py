@@ -19,112 +19,132 @@ WALLBOX_ANSWERS = {
 }
 
 WALLBOX_BLE = { 
-    "LOGIN" : "$BLE,AUTH,{pin}\n", 
-    "LOGOUT" : "$BLE,LOGOUT\n" 
+    "LOGIN" : b"$BLE,AUTH,%s\n", 
+    "LOGOUT" : b"$BLE,LOGOUT\n" 
 }
 
 WALLBOX_COMMANDS = { 
-    "START_CHARGE" : "$CMD,CHARGE,START,{delay}\n", 
-    "STOP_CHARGE" : "$CMD,CHARGE,STOP,{delay}\n" 
+    "START_CHARGE" : b"$CMD,CHARGE,START,%d\n", 
+    "STOP_CHARGE" : b"$CMD,CHARGE,STOP,%d\n" 
 }
 
 WALLBOX_EPROM = { 
-    "INDEX_WRITE" : "$EEP,WRITE,IDX\n",
-    "INDEX_READ" : "$EEP,READ,IDX\n",
-    "READ_ALARMS" : "$EEP,READ,AL\n",
-    "READ_MANUFACTURING" : "$EEP,READ,MF\n",
-    "READ_SESSIONS" : "$EEP,READ,SL\n",
-    "READ_SETTINGS" : "$EEP,READ,ST\n",
-    "READ_APP_DATA" : "$DATA,READ,AD\n",
-    "READ_HW_SETTINGS" : "$DATA,READ,HS\n",
-    "READ_SUPPLY_VOLTAGE" : "$DATA,READ,SV\n",
-
-    "SET_USER_LIMIT" : "$EEP,WRITE,IDX,174,{limit}\n",
-    "SET_DPM_LIMIT" : "$EEP,WRITE,IDX,158,{limit}\n",
-    "SET_SAFE_LIMIT" : "$EEP,WRITE,IDX,156,{limit}\n",
-    "SET_DPM_OFF" : "$EEP,WRITE,IDX,178,0\n",
-    "SET_DPM_ON" : "$EEP,WRITE,IDX,178,1\n",
-
-    "GET_USER_LIMIT" : "$EEP,READ,IDX,174\n",
-    "GET_DPM_LIMIT" : "$EEP,READ,IDX,158\n",
-    "GET_SAFE_LIMIT" : "$EEP,READ,IDX,156\n",
-    "GET_DPM_STATUS" : "$EEP,READ,IDX,178\n"
+    "INDEX_WRITE" : b"$EEP,WRITE,IDX\n",
+    "INDEX_READ" : b"$EEP,READ,IDX\n",
+    "READ_ALARMS" : b"$EEP,READ,AL\n",
+    "READ_MANUFACTURING" : b"$EEP,READ,MF\n",
+    "READ_SESSIONS" : b"$EEP,READ,SL\n",
+    "READ_SETTINGS" : b"$EEP,READ,ST\n",
+    "READ_APP_DATA" : b"$DATA,READ,AD\n",
+    "READ_HW_SETTINGS" : b"$DATA,READ,HS\n",
+    "READ_SUPPLY_VOLTAGE" : b"$DATA,READ,SV\n",
+
+    "SET_USER_LIMIT" : b"$EEP,WRITE,IDX,174,%d\n",
+    "SET_DPM_LIMIT" : b"$EEP,WRITE,IDX,158,%d\n",
+    "SET_SAFE_LIMIT" : b"$EEP,WRITE,IDX,156,%d\n",
+    "SET_DPM_OFF" : b"$EEP,WRITE,IDX,178,0\n",
+    "SET_DPM_ON" : b"$EEP,WRITE,IDX,178,1\n",
+
+    "GET_USER_LIMIT" : b"$EEP,READ,IDX,174\n",
+    "GET_DPM_LIMIT" : b"$EEP,READ,IDX,158\n",
+    "GET_SAFE_LIMIT" : b"$EEP,READ,IDX,156\n",
+    "GET_DPM_STATUS" : b"$EEP,READ,IDX,178\n"
 }
 
+# Templates resolved once at import; the wrappers below skip the dict lookups.
+# Commands are ASCII bytes so they can be written to BLE without encoding.
+_SET_USER_LIMIT = WALLBOX_EPROM["SET_USER_LIMIT"]
+_GET_USER_LIMIT = WALLBOX_EPROM["GET_USER_LIMIT"]
+_SET_SAFE_LIMIT = WALLBOX_EPROM["SET_SAFE_LIMIT"]
+_GET_SAFE_LIMIT = WALLBOX_EPROM["GET_SAFE_LIMIT"]
+_SET_DPM_LIMIT = WALLBOX_EPROM["SET_DPM_LIMIT"]
+_GET_DPM_LIMIT = WALLBOX_EPROM["GET_DPM_LIMIT"]
+_SET_DPM_ON = WALLBOX_EPROM["SET_DPM_ON"]
+_SET_DPM_OFF = WALLBOX_EPROM["SET_DPM_OFF"]
+_GET_DPM_STATUS = WALLBOX_EPROM["GET_DPM_STATUS"]
+_READ_MANUFACTURING = WALLBOX_EPROM["READ_MANUFACTURING"]
+_READ_SETTINGS = WALLBOX_EPROM["READ_SETTINGS"]
+_READ_APP_DATA = WALLBOX_EPROM["READ_APP_DATA"]
+_READ_HW_SETTINGS = WALLBOX_EPROM["READ_HW_SETTINGS"]
+_READ_SUPPLY_VOLTAGE = WALLBOX_EPROM["READ_SUPPLY_VOLTAGE"]
+_START_CHARGE = WALLBOX_COMMANDS["START_CHARGE"]
+_STOP_CHARGE = WALLBOX_COMMANDS["STOP_CHARGE"]
+_LOGIN = WALLBOX_BLE["LOGIN"]
+
 # ============================================================================
 # Wrapper Functions for Commands
 # ============================================================================
 
 # EPROM Commands - Limits
-def setUserLimit(value: int) -> str:
+def setUserLimit(value: int) -> bytes:
     """Set user current limit."""
-    return WALLBOX_EPROM["SET_USER_LIMIT"].format(limit=str(value))
+    return _SET_USER_LIMIT % value
 
-def getUserLimit() -> str:
+def getUserLimit() -> bytes:
     """Get user current limit."""
-    return WALLBOX_EPROM["GET_USER_LIMIT"]
+    return _GET_USER_LIMIT
 
-def setSafeLimit(value: int) -> str:
+def setSafeLimit(value: int) -> bytes:
     """Set safe current limit."""
-    return WALLBOX_EPROM["SET_SAFE_LIMIT"].format(limit=str(value))
+    return _SET_SAFE_LIMIT % value
 
-def getSafeLimit() -> str:
+def getSafeLimit() -> bytes:
     """Get safe current limit."""
-    return WALLBOX_EPROM["GET_SAFE_LIMIT"]
+    return _GET_SAFE_LIMIT
 
-def setDpmLimit(value: int) -> str:
+def setDpmLimit(value: int) -> bytes:
     """Set DPM limit."""
-    return WALLBOX_EPROM["SET_DPM_LIMIT"].format(limit=str(value))
+    return _SET_DPM_LIMIT % value
 
-def getDpmLimit() -> str:
+def getDpmLimit() -> bytes:
     """Get DPM limit."""
-    return WALLBOX_EPROM["GET_DPM_LIMIT"]
+    return _GET_DPM_LIMIT
 
 # EPROM Commands - DPM Control
-def setDpmOn() -> str:
+def setDpmOn() -> bytes:
     """Enable Dynamic Power Management."""
-    return WALLBOX_EPROM["SET_DPM_ON"]
+    return _SET_DPM_ON
 
-def setDpmOff() -> str:
+def setDpmOff() -> bytes:
     """Disable Dynamic Power Management."""
-    return WALLBOX_EPROM["SET_DPM_OFF"]
+    return _SET_DPM_OFF
 
-def getDpmStatus() -> str:
+def getDpmStatus() -> bytes:
     """Get DPM status."""
-    return WALLBOX_EPROM["GET_DPM_STATUS"]
+    return _GET_DPM_STATUS
 
 # EPROM Commands - Read Data
-def readManufacturing() -> str:
+def readManufacturing() -> bytes:
     """Read manufacturing data."""
-    return WALLBOX_EPROM["READ_MANUFACTURING"]
+    return _READ_MANUFACTURING
 
-def readSettings() -> str:
+def readSettings() -> bytes:
     """Read settings."""
-    return WALLBOX_EPROM["READ_SETTINGS"]
+    return _READ_SETTINGS
 
-def readAppData() -> str:
+def readAppData() -> bytes:
     """Read application data."""
-    return WALLBOX_EPROM["READ_APP_DATA"]
+    return _READ_APP_DATA
 
-def readHwSettings() -> str:
+def readHwSettings() -> bytes:
     """Read hardware settings."""
-    return WALLBOX_EPROM["READ_HW_SETTINGS"]
+    return _READ_HW_SETTINGS
 
-def readSupplyVoltage() -> str:
+def readSupplyVoltage() -> bytes:
     """Read supply voltage."""
-    return WALLBOX_EPROM["READ_SUPPLY_VOLTAGE"]
+    return _READ_SUPPLY_VOLTAGE
 
 # Charge Commands
-def startCharge(delay: int = 0) -> str:
+def startCharge(delay: int = 0) -> bytes:
     """Start charging."""
-    return WALLBOX_COMMANDS["START_CHARGE"].format(delay=delay)
+    return _START_CHARGE % delay
 
-def stopCharge(delay: int = 0) -> str:
+def stopCharge(delay: int = 0) -> bytes:
     """Stop charging."""
-    return WALLBOX_COMMANDS["STOP_CHARGE"].format(delay=delay)
+    return _STOP_CHARGE % delay
 
 # BLE Authentication
-def login(pin: str) -> str:
+def login(pin: str) -> bytes:
     """Authenticate with Wallbox."""
-    return WALLBOX_BLE["LOGIN"].format(pin=pin)
+    return _LOGIN % pin.encode()
 
@@ -5,7 +5,7 @@ from dataclasses import dataclass
 
 log = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Config:
     wallbox_address: str
     wallbox_pin: str
@@ -13,6 +13,7 @@ class Config:
     mqtt_port: int
     mqtt_username: str
     mqtt_password: str
+    legacy_discovery: bool = False
 
 def get_required_env(key: str) -> str:
     """Get a required environment variable or raise ValueError."""
@@ -31,6 +32,7 @@ def load_config() -> Config:
             mqtt_port=int(get_required_env('MQTT_PORT')),
             mqtt_username=get_required_env('MQTT_USERNAME'),
             mqtt_password=get_required_env('MQTT_PASSWORD'),
+            legacy_discovery=os.getenv('LEGACY_DISCOVERY', 'false').lower() == 'true',
         )
         log.info("Configuration loaded successfully")
         return config
@@ -2,126 +2,148 @@
 import asyncio
 import logging
 from .config import Config
-from .mqtt_manager import MQTTManager
+from .mqtt_manager import MQTTManager, BASE_TOPIC
 from .ble_manager import BLEManager
-from .mqtt_ble_mapper import MQTTBLEMapper
-from .bluetoothCommands import (
-    getUserLimit, getSafeLimit
-)
+from .mqtt_ble_mapper import map_command
 
 log = logging.getLogger(__name__)
 
+# Notifications arriving within this window (seconds) share one MQTT message
+MESSAGE_BATCH_WINDOW = 0.05
+
+# EPROM read responses: "$EEP,READ,IDX,<idx>,<value>"
+EEP_READ_PREFIX = "$EEP,READ,IDX,"
+EEP_READ_PREFIX_LEN = len(EEP_READ_PREFIX)
+
+# EPROM index -> state topic it updates
+IDX_TO_TOPIC = {
+    "174": "number/user_limit/state",
+    "156": "number/safe_limit/state",
+}
+
 class Coordinator:
     def __init__(self, config: Config):
         self._config = config
         self._mqtt = MQTTManager(config, self._on_mqtt_message)
         self._ble = BLEManager(config, self._on_ble_notify, self._on_ble_connection_change)
         self._last_data = ""
-        self._mapper = MQTTBLEMapper()
+        self._pending_messages: list[str] = []
+        self._flush_task: asyncio.Task | None = None
+        self._background_tasks: set[asyncio.Task] = set()
+        self._ble_task: asyncio.Task | None = None
+        self._topic_prefix = f"{BASE_TOPIC}/"
+        self._topic_prefix_len = len(self._topic_prefix)
 
     async def start(self):
         """Start the coordinator and managers."""
         log.info("Starting Coordinator...")
         
         # Run both managers concurrently
+        self._ble_task = asyncio.create_task(self._ble.start())
         await asyncio.gather(
             self._mqtt.start(),
-            self._ble.start()
+            self._ble_task
         )
 
     async def _on_mqtt_message(self, topic: str, payload: str):
         """Handle incoming MQTT messages."""
-        log.debug(f"Coordinator received MQTT: {topic} -> {payload}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Coordinator received MQTT: %s -> %s", topic, payload)
         
         # Extract subtopic
-        base_topic = "easywallbox"
-        if not topic.startswith(base_topic):
+        if not topic.startswith(self._topic_prefix):
             return
         
-        subtopic = topic[len(base_topic):].lstrip('/')
+        subtopic = topic[self._topic_prefix_len:]
         
         # Map MQTT to BLE command
-        command = self._mapper.map_command(subtopic, payload)
+        command = map_command(subtopic, payload)
         
         if command:
-            log.info(f"Forwarding to BLE: {command.strip()}")
+            if log.isEnabledFor(logging.INFO):
+                log.info("Forwarding to BLE: %s", command.decode().strip())
             try:
                 await self._ble.write(command)
-                
-                # Handle refresh (requires multiple commands)
-                # if self._mapper.needs_multiple_commands(subtopic, payload):
-                #     for cmd in self._mapper.get_refresh_commands()[1:]:  # Skip first (already sent)
-                #         log.info(f"Forwarding to BLE: {cmd.strip()}")
-                #         await self._ble.write(cmd)
-                
-                # # Optimistic state update / Read-after-write
-                # # We want to read back values for limits
-                # if subtopic == "limit":
-                #     await self._read_after_write(subtopic, payload)
-                    
             except Exception as e:
-                log.error(f"Failed to forward to BLE: {e}")
-
-    async def _read_after_write(self, subtopic: str, payload: str):
-        """Read actual value from Wallbox after writing."""
-        read_command = None
-        
-        if subtopic == "limit":
-            if payload.startswith("user/"):
-                read_command = getUserLimit()
-            elif payload.startswith("safe/"):
-                read_command = getSafeLimit()
-        
-        if read_command:
-            log.info(f"Reading back state: {read_command.strip()}")
-            await self._ble.write(read_command)
+                log.error("Failed to forward to BLE: %s", e)
 
     async def _on_ble_connection_change(self, connected: bool):
         """Handle BLE connection state changes."""
         state = "online" if connected else "offline"
-        log.info(f"BLE Connection State Changed: {state}")
+        log.info("BLE Connection State Changed: %s", state)
         
         # Publish availability
-        await self._mqtt.publish("availability", state)
-        await self._mqtt.publish("sensor/connectivity/state", "ON" if connected else "OFF")
+        await asyncio.gather(
+            self._mqtt.publish("availability", state),
+            self._mqtt.publish("sensor/connectivity/state", "ON" if connected else "OFF")
+        )
 
     async def _on_ble_notify(self, data: str):
         """Handle incoming BLE notifications."""
-        log.info(f"Coordinator received BLE notify: {data.strip()}")
         self._last_data = data.strip()
+        log.debug("Coordinator received BLE notify: %s", self._last_data)
         
-        # Parse response and update HA states
-        await self._parse_and_update_state(data.strip())
+        # Parse response and update HA states; only matched reads cost a publish task
+        update = self._parse_state(self._last_data)
+        if update is not None:
+            self._spawn(self._mqtt.publish(*update))
         
-        # Forward raw data to MQTT
+        # Forward raw data to MQTT, batching bursts of lines
+        self._pending_messages.append(data)
+        if self._flush_task is None:
+            self._flush_task = self._spawn(self._flush_messages())
+
+    def _spawn(self, coro) -> asyncio.Task:
+        """Run a coroutine in the background, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _flush_messages(self):
+        """Publish the notifications collected during the batch window as one message."""
+        await asyncio.sleep(MESSAGE_BATCH_WINDOW)
+        data = "".join(self._pending_messages)
+        self._pending_messages.clear()
+        self._flush_task = None
         await self._mqtt.publish("message", data)
     
-    async def _parse_and_update_state(self, data: str):
-        """Parse Wallbox response and update Home Assistant entity states."""
+    def _parse_state(self, data: str) -> tuple[str, str] | None:
+        """Parse a Wallbox response into the (state topic, value) it updates, if any."""
+        # Example responses:
+        # $EEP,READ,IDX,174,160  (User limit = 16.0A)
+        # $EEP,READ,IDX,156,320  (Safe limit = 32.0A)
+        
+        # NOTE: EPROM indices below should be verified from actual Wallbox logs
+        # Check easywallbox/message topic for real responses
+        
+        if not data.startswith(EEP_READ_PREFIX):
+            return None
+        
+        # Slice out just the index and value fields
+        sep = data.find(",", EEP_READ_PREFIX_LEN)
+        if sep == -1:
+            return None
+        topic = IDX_TO_TOPIC.get(data[EEP_READ_PREFIX_LEN:sep])
+        if topic is None:
+            return None
+        
+        end = data.find(",", sep + 1)
         try:
-            # Example responses:
-            # $EEP,READ,IDX,174,160  (User limit = 16.0A)
-            # $EEP,READ,IDX,172,320  (Safe limit = 32.0A)
-            
-            # NOTE: EPROM indices below should be verified from actual Wallbox logs
-            # Check easywallbox/message topic for real responses
-            
-            if data.startswith("$EEP,READ,IDX,"):
-                parts = data.split(",")
-                if len(parts) >= 5:
-                    idx = parts[3]
-                    value = int(parts[4].strip())
-                    
-                    # Map index to entity
-                    if idx == "174":  # User limit
-                        await self._mqtt.publish("number/user_limit/state", str(value))
-                    elif idx == "156":  # Safe limit
-                        await self._mqtt.publish("number/safe_limit/state", str(value))
+            value = int(data[sep + 1:end] if end != -1 else data[sep + 1:])
+        except ValueError:
+            log.warning("Failed to parse response: %s", data)
+            return None
         
-        except Exception as e:
-            log.warning(f"Failed to parse response: {e}")
+        return topic, str(value)
 
-    def stop(self):
-        """Stop the coordinator."""
-        self._mqtt.stop()
+    async def stop(self):
+        """Stop the coordinator, BLE first so its offline state still reaches MQTT."""
         self._ble.stop()
+        if self._ble_task is not None:
+            # Wait without cancelling: the BLE loop publishes offline on its way out
+            await asyncio.wait((self._ble_task,))
+        # Let pending state updates and the last message batch go out
+        if self._background_tasks:
+            await asyncio.wait(self._background_tasks)
+        self._mqtt.stop()
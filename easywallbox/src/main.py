@@ -6,6 +6,11 @@ import signal
 from .config import load_config
 from .coordinator import Coordinator
 
+try:
+    import uvloop
+except ImportError:  # optional; no wheel on every add-on architecture
+    uvloop = None
+
 
 # Logging configuration
 FORMAT = ('%(asctime)-15s %(threadName)-15s '
@@ -13,6 +18,12 @@ FORMAT = ('%(asctime)-15s %(threadName)-15s '
 logging.basicConfig(format=FORMAT, level=logging.INFO)
 log = logging.getLogger(__name__)
 
+# Upper bound (seconds) for the managers' clean stop before they are cancelled
+SHUTDOWN_TIMEOUT = 5.0
+
+class _ShutdownSignal(Exception):
+    """Raised inside the task group to unwind it on SIGINT/SIGTERM."""
+
 async def main():
     """Main function."""
     log.info("--- Starting EasyWallbox Controller ---")
@@ -32,33 +43,31 @@ async def main():
     def signal_handler():
         log.info("Signal received, stopping...")
         stop_event.set()
-        coordinator.stop()
 
     for sig in (signal.SIGINT, signal.SIGTERM):
         loop.add_signal_handler(sig, signal_handler)
 
-    # Start coordinator
-    coordinator_task = asyncio.create_task(coordinator.start())
-
-    # Wait for stop signal
-    await stop_event.wait()
-    
-
-    # Wait for coordinator to finish (if it returns)
-    # In this design, coordinator.start() runs forever until stopped
-    # We can cancel it or wait for it to exit if it handles stop() gracefully
+    # Run the coordinator until a stop signal; the task group surfaces its
+    # errors right away and cancels it on the way out, once it has stopped cleanly
     try:
-        await asyncio.wait_for(coordinator_task, timeout=5.0)
-    except asyncio.TimeoutError:
-        log.warning("Coordinator did not stop in time, cancelling...")
-        coordinator_task.cancel()
-    except asyncio.CancelledError:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(coordinator.start())
+            await stop_event.wait()
+            try:
+                await asyncio.wait_for(coordinator.stop(), timeout=SHUTDOWN_TIMEOUT)
+            except asyncio.TimeoutError:
+                log.warning("Coordinator did not stop in time, cancelling...")
+            raise _ShutdownSignal
+    except* _ShutdownSignal:
         pass
     
     log.info("EasyWallbox Controller stopped.")
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         pass
@@ -3,29 +3,27 @@
 This module provides a centralized mapping between MQTT topics/payloads
 and Bluetooth Low Energy commands for the Wallbox.
 """
-import logging
-from typing import Optional, Dict, Any, Callable
+import functools
+import re
+from typing import Optional, Dict, Any, Callable, Tuple
 from .bluetoothCommands import (
     setUserLimit, getUserLimit,
     setSafeLimit, getSafeLimit,
     setDpmLimit, getDpmLimit,
-    setDpmLimit, getDpmLimit,
     startCharge, stopCharge,
     readSettings, readAppData,
     readManufacturing, readHwSettings, readSupplyVoltage
 )
 
-log = logging.getLogger(__name__)
-
-# Declarative Mapping: Topic -> { Payload : BLE_Command or Function }
+# Declarative Mapping: Subtopic (under "easywallbox/") -> { Payload : BLE_Command or Function }
 MQTT2BLE: Dict[str, Dict[str, Any]] = {
-    "easywallbox/charge": {
+    "charge": {
         "start": startCharge(0),
         "start/": startCharge,  # Function reference
         "stop": stopCharge(0),
         "stop/": stopCharge,    # Function reference
     },
-    "easywallbox/limit": {
+    "limit": {
         "dpm": getDpmLimit(),
         "dpm/": setDpmLimit,    # Function reference
         "safe": getSafeLimit(),
@@ -33,7 +31,7 @@ MQTT2BLE: Dict[str, Dict[str, Any]] = {
         "user": getUserLimit(),
         "user/": setUserLimit,  # Function reference
     },
-    "easywallbox/read": {
+    "read": {
         "manufacturing": readManufacturing(),
         "settings": readSettings(),
         "app_data": readAppData(),
@@ -42,65 +40,57 @@ MQTT2BLE: Dict[str, Dict[str, Any]] = {
     },
 }
 
-class MQTTBLEMapper:
-    """Maps MQTT topics and payloads to BLE commands using a declarative map."""
-    
-    @staticmethod
-    def map_command(subtopic: str, payload: str) -> Optional[str]:
-        """
-        Map an MQTT topic and payload to a BLE command.
-        """
-        full_topic = f"easywallbox/{subtopic}"
-        
-        try:
-            # 1. Check exact match in MQTT2BLE
-            if full_topic in MQTT2BLE:
-                topic_map = MQTT2BLE[full_topic]
-                
-                # A) Exact payload match (e.g. "on" -> setDpmOn())
-                if payload in topic_map:
-                    return topic_map[payload]
-                
-                # B) Dynamic payload with separator (e.g. "limit/16")
-                # Check for keys ending with "/" which indicate function references
-                # This handles cases where payload is just "16" but we match a key like "limit/"?
-                # No, the user request implies payload is "limit/16" for legacy or just "16" for HA?
-                # Let's support the user's explicit structure: "limit/" : setDpmLimit
-                
-                # C) Handle "cmd/val" payloads for legacy topics
-                # e.g. topic="easywallbox/dpm", payload="limit/16"
-                if "/" in payload:
-                    cmd_part, val_part = payload.split("/", 1)
-                    cmd_key = f"{cmd_part}/"
-                    if cmd_key in topic_map:
-                        func = topic_map[cmd_key]
-                        if callable(func):
-                            try:
-                                return func(int(val_part))
-                            except ValueError:
-                                pass
-                
-            return None
-            
-        except Exception as e:
-            log.warning(f"Error mapping MQTT to BLE: {e}")
-            return None
+# Flat dispatch tables precomputed from MQTT2BLE at import time:
+# (subtopic, payload) -> command, and (subtopic, "cmd") -> setter for "cmd/<value>" payloads.
+STATIC_COMMANDS: Dict[Tuple[str, str], bytes] = {
+    (topic, key): value
+    for topic, topic_map in MQTT2BLE.items()
+    for key, value in topic_map.items()
+    if not callable(value)
+}
+DYNAMIC_COMMANDS: Dict[Tuple[str, str], Callable[[int], bytes]] = {
+    (topic, key[:-1]): value
+    for topic, topic_map in MQTT2BLE.items()
+    for key, value in topic_map.items()
+    if callable(value) and key.endswith("/")
+}
+
+# "cmd/<value>" payloads; whole floats such as "user/16.0" are accepted too
+_DYNAMIC_PAYLOAD = re.compile(r"([a-z_]+)/([0-9]+)(?:\.0*)?")
+
+# Commands sent for a full refresh, built once
+REFRESH_COMMANDS: Tuple[bytes, ...] = (
+    readSettings(),
+    readAppData(),
+    readManufacturing(),
+    readHwSettings(),
+    readSupplyVoltage(),
+    getDpmLimit(),
+    getSafeLimit(),
+    getUserLimit(),
+)
+
+# Pure mapping: Home Assistant repeats the same few (subtopic, payload) pairs
+@functools.lru_cache(maxsize=256)
+def map_command(subtopic: str, payload: str) -> Optional[bytes]:
+    """
+    Map an MQTT topic and payload to a BLE command.
+    """
+    # A) Exact payload match (e.g. "start" -> startCharge(0))
+    command = STATIC_COMMANDS.get((subtopic, payload))
+    if command is not None:
+        return command
     
-    @staticmethod
-    def needs_multiple_commands(subtopic: str, payload: str) -> bool:
-        """Check if this command requires multiple BLE commands."""
-        return subtopic == "read" and payload == "settings"
+    # B) "cmd/val" payloads (e.g. "user/16" -> setUserLimit(16))
+    match = _DYNAMIC_PAYLOAD.fullmatch(payload)
+    if match:
+        cmd_part, val_part = match.groups()
+        func = DYNAMIC_COMMANDS.get((subtopic, cmd_part))
+        if func:
+            return func(int(val_part))
     
-    @staticmethod
-    def get_refresh_commands() -> list[str]:
-        """Get all commands for refresh operation."""
-        return [
-            readSettings(),
-            readAppData(),
-            readManufacturing(),
-            readHwSettings(),
-            readSupplyVoltage(),
-            getDpmLimit(),
-            getSafeLimit(),
-            getUserLimit()
-        ]
+    return None
+
+def needs_multiple_commands(subtopic: str, payload: str) -> bool:
+    """Check if this command requires multiple BLE commands."""
+    return subtopic == "read" and payload == "settings"
@@ -1,30 +1,123 @@
 """MQTT Manager for EasyWallbox."""
 import asyncio
+import json
 import logging
+import random
+import socket
 import aiomqtt
 from typing import Callable, Optional
 from .config import Config
 
 log = logging.getLogger(__name__)
 
+BASE_TOPIC = "easywallbox"
+COMMAND_TOPICS = tuple(f"{BASE_TOPIC}/{name}" for name in ("dpm", "charge", "limit", "read"))
+COMMAND_SUBSCRIPTIONS = [(topic, 0) for topic in COMMAND_TOPICS]
+
+# Commands and state updates are tiny; send them without Nagle's delay
+SOCKET_OPTIONS = ((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),)
+
+# Reconnect backoff (seconds): doubles after each failure, jittered so
+# add-ons don't all hit a restarted broker at once
+RECONNECT_DELAY_MIN = 1.0
+RECONNECT_DELAY_MAX = 60.0
+
+# Inbound commands waiting for the callback; the oldest is dropped when full
+MESSAGE_QUEUE_SIZE = 64
+
+# How long (seconds) to wait for retained discovery configs after subscribing
+RETAINED_PROBE_TIMEOUT = 0.5
+
+# Marks a discovery topic as moving to the other schema (device-based <-> per-entity)
+DISCOVERY_MIGRATE = b'{"migrate_discovery":true}'
+
+# Home Assistant entities: (component, object_id, entity-specific config)
+DISCOVERY_ENTITIES = (
+    ("binary_sensor", "connectivity", {
+        "name": "Connectivity",
+        "device_class": "connectivity",
+        "state_topic": f"{BASE_TOPIC}/sensor/connectivity/state",
+    }),
+    ("number", "user_limit", {
+        "name": "User Current Limit",
+        "command_topic": f"{BASE_TOPIC}/limit",
+        "state_topic": f"{BASE_TOPIC}/number/user_limit/state",
+        "command_template": "user/{{ value }}",
+        "min": 6,
+        "max": 32,
+        "step": 1,
+        "unit_of_measurement": "A",
+        "icon": "mdi:current-ac",
+    }),
+    ("number", "safe_limit", {
+        "name": "Safe Current Limit",
+        "command_topic": f"{BASE_TOPIC}/limit",
+        "state_topic": f"{BASE_TOPIC}/number/safe_limit/state",
+        "command_template": "safe/{{ value }}",
+        "min": 6,
+        "max": 32,
+        "step": 1,
+        "unit_of_measurement": "A",
+        "icon": "mdi:shield-check",
+    }),
+    ("button", "start_charge", {
+        "name": "Start Charging",
+        "command_topic": f"{BASE_TOPIC}/charge",
+        "payload_press": "start",
+        "icon": "mdi:ev-plug-type2",
+    }),
+    ("button", "stop_charge", {
+        "name": "Stop Charging",
+        "command_topic": f"{BASE_TOPIC}/charge",
+        "payload_press": "stop",
+        "icon": "mdi:ev-plug-type2-off",
+    }),
+    ("button", "refresh", {
+        "name": "Refresh Data",
+        "command_topic": f"{BASE_TOPIC}/read",
+        "payload_press": "voltage",
+        "icon": "mdi:refresh",
+    }),
+    ("button", "voltage", {
+        "name": "Voltage",
+        "command_topic": f"{BASE_TOPIC}/read",
+        "payload_press": "voltage",
+        "icon": "mdi:current-ac",
+    }),
+)
+
 class MQTTManager:
     def __init__(self, config: Config, on_message_callback: Callable[[str, str], None]):
         self._config = config
         self._on_message_callback = on_message_callback
         self._client: Optional[aiomqtt.Client] = None
         self._running = False
+        self._reconnect_delay = RECONNECT_DELAY_MIN
+        self._topics: dict[str, str] = {}  # subtopic -> full topic
+        self._messages: asyncio.Queue[tuple[str, str]] = asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+        self._worker: Optional[asyncio.Task] = None
+        self._device_info = {
+            "identifiers": [config.wallbox_address],
+            "name": "EasyWallbox",
+            "manufacturer": "Free2Move",
+            "model": "EasyWallbox",
+        }
+        self._old_discovery_topics, self._discovery = self._build_discovery()
 
     async def start(self):
         """Start the MQTT client loop."""
         self._running = True
+        if self._on_message_callback and self._worker is None:
+            self._worker = asyncio.create_task(self._process_messages())
         while self._running:
             try:
-                log.info(f"Connecting to MQTT Broker at {self._config.mqtt_host}:{self._config.mqtt_port}...")
+                log.info("Connecting to MQTT Broker at %s:%s...", self._config.mqtt_host, self._config.mqtt_port)
                 async with aiomqtt.Client(
                     hostname=self._config.mqtt_host,
                     port=self._config.mqtt_port,
                     username=self._config.mqtt_username,
                     password=self._config.mqtt_password,
+                    socket_options=SOCKET_OPTIONS,
                 ) as client:
                     self._client = client
                     log.info("Connected to MQTT Broker!")
@@ -33,154 +126,171 @@ class MQTTManager:
                     await self.publish_discovery()
                     
                     # Subscribe to topics
-                    base_topic = "easywallbox"
-                    topics = [
-                        f"{base_topic}/dpm",
-                        f"{base_topic}/charge",
-                        f"{base_topic}/limit",
-                        f"{base_topic}/read",
-                    ]
-                    for topic in topics:
-                        await client.subscribe(topic)
-                        log.info(f"Subscribed to: {topic}")
+                    # (one SUBSCRIBE packet for all command topics)
+                    await client.subscribe(COMMAND_SUBSCRIPTIONS)
+                    log.info("Subscribed to: %s", ", ".join(COMMAND_TOPICS))
+                    self._reconnect_delay = RECONNECT_DELAY_MIN
 
                     # Message loop
                     async for message in client.messages:
                         topic = message.topic.value
-                        payload = message.payload.decode() if isinstance(message.payload, bytes) else str(message.payload)
-                        log.debug(f"MQTT Received [{topic}]: {payload}")
+                        # Normalized once here; downstream handlers never strip again
+                        payload = message.payload.decode("ascii", "replace").strip()
+                        log.debug("MQTT Received [%s]: %s", topic, payload)
                         
-                        try:
-                            if self._on_message_callback:
-                                await self._on_message_callback(topic, payload)
-                        except Exception as e:
-                            log.error(f"Error processing MQTT message: {e}")
+                        # Hand off so a slow BLE write never stalls the receive loop
+                        if self._on_message_callback:
+                            self._enqueue(topic, payload)
 
             except aiomqtt.MqttError as e:
-                log.error(f"MQTT Connection error: {e}")
-                self._client = None
-                await asyncio.sleep(5) # Wait before reconnecting
+                log.error("MQTT Connection error: %s", e)
             except Exception as e:
-                log.error(f"Unexpected MQTT error: {e}")
-                self._client = None
-                await asyncio.sleep(5)
+                log.error("Unexpected MQTT error: %s", e)
+            self._client = None
+            
+            if self._running:
+                delay = self._reconnect_delay * (0.5 + random.random())
+                log.info("Waiting %.1f seconds before reconnecting MQTT...", delay)
+                await asyncio.sleep(delay)
+                self._reconnect_delay = min(self._reconnect_delay * 2, RECONNECT_DELAY_MAX)
+
+    def _enqueue(self, topic: str, payload: str):
+        """Queue a message for the worker, dropping the oldest one if full."""
+        if self._messages.full():
+            dropped_topic, _ = self._messages.get_nowait()
+            log.warning("MQTT message queue full, dropping message for %s", dropped_topic)
+        self._messages.put_nowait((topic, payload))
+
+    async def _process_messages(self):
+        """Deliver queued messages to the message callback in arrival order, collapsing repeated setters."""
+        messages = self._messages
+        while True:
+            # Drain whatever queued up during the last callback. A "cmd/<value>" setter
+            # replaces the one right before it when both target the same command on the
+            # same topic (e.g. "user/18" right after "user/16"); nothing is ever moved
+            # ahead of a message that arrived between two setters.
+            pending: list[tuple[str, str]] = []
+            last_key = None
+            item = await messages.get()
+            while True:
+                topic, payload = item
+                head, sep, _ = payload.partition("/")
+                key = (topic, head) if sep else None
+                if key is not None and key == last_key:
+                    pending[-1] = item
+                else:
+                    pending.append(item)
+                last_key = key
+                if messages.empty():
+                    break
+                item = messages.get_nowait()
+            
+            for topic, payload in pending:
+                try:
+                    await self._on_message_callback(topic, payload)
+                except Exception as e:
+                    log.error("Error processing MQTT message: %s", e)
 
     async def publish_discovery(self):
         """Publish Home Assistant MQTT Discovery payloads."""
         if not self._client: return
-        
-        device_info = {
-            "identifiers": [self._config.wallbox_address],
-            "name": "EasyWallbox",
-            "manufacturer": "Free2Move",
-            "model": "EasyWallbox",
-        }
-        
-        base_topic = "easywallbox"
-        
-        # Helper to publish config
-        async def pub_config(component, object_id, config):
-            topic = f"homeassistant/{component}/easywallbox/{object_id}/config"
-            
-            # Add availability to all entities
-            config["availability_topic"] = f"{base_topic}/availability"
-            
-            import json
-            await self._client.publish(topic, json.dumps(config), retain=True)
-
-        # 1. Connectivity (Binary Sensor)
-        await pub_config("binary_sensor", "connectivity", {
-            "name": "Connectivity",
-            "device_class": "connectivity",
-            "state_topic": f"{base_topic}/sensor/connectivity/state",
-            "unique_id": f"easywallbox_{self._config.wallbox_address}_connectivity",
-            "device": device_info
-        })
-        
-        # User Limit Number
-        await pub_config("number", "user_limit", {
-            "name": "User Current Limit",
-            "command_topic": f"{base_topic}/limit",
-            "state_topic": f"{base_topic}/number/user_limit/state",
-            "command_template": "user/{{ value }}",
-            "min": 6,
-            "max": 32,
-            "step": 1,
-            "unit_of_measurement": "A",
-            "icon": "mdi:current-ac",
-            "unique_id": f"easywallbox_{self._config.wallbox_address}_user_limit",
-            "device": device_info
-        })
-        
-        # Safe Limit Number
-        await pub_config("number", "safe_limit", {
-            "name": "Safe Current Limit",
-            "command_topic": f"{base_topic}/limit",
-            "state_topic": f"{base_topic}/number/safe_limit/state",
-            "command_template": "safe/{{ value }}",
-            "min": 6,
-            "max": 32,
-            "step": 1,
-            "unit_of_measurement": "A",
-            "icon": "mdi:shield-check",
-            "unique_id": f"easywallbox_{self._config.wallbox_address}_safe_limit",
-            "device": device_info
-        })
-
-        # Start Charge Button
-        await pub_config("button", "start_charge", {
-            "name": "Start Charging",
-            "command_topic": f"{base_topic}/charge",
-            "payload_press": "start",
-            "icon": "mdi:ev-plug-type2",
-            "unique_id": f"easywallbox_{self._config.wallbox_address}_start_charge",
-            "device": device_info
-        })
-
-        # Stop Charge Button
-        await pub_config("button", "stop_charge", {
-            "name": "Stop Charging",
-            "command_topic": f"{base_topic}/charge",
-            "payload_press": "stop",
-            "icon": "mdi:ev-plug-type2-off",
-            "unique_id": f"easywallbox_{self._config.wallbox_address}_stop_charge",
-            "device": device_info
-        })
-        
-        # Refresh Button
-        await pub_config("button", "refresh", {
-            "name": "Refresh Data",
-            "command_topic": f"{base_topic}/read",
-            "payload_press": "voltage",
-            "icon": "mdi:refresh",
-            "unique_id": f"easywallbox_{self._config.wallbox_address}_refresh",
-            "device": device_info
-        })
-
-        await pub_config("button", "voltage", {
-            "name": "Voltage",
-            "command_topic": f"{base_topic}/read",
-            "payload_press": "voltage",
-            "icon": "mdi:current-ac",
-            "unique_id": f"easywallbox_{self._config.wallbox_address}_voltage",
-            "device": device_info
-        })
-        
+
+        # Home Assistant's discovery migration, only when the other schema's configs
+        # are still retained: mark them as migrating, publish ours, then clear them
+        old_topics = await self._retained_topics(self._old_discovery_topics)
+        if old_topics:
+            log.info("Migrating %d MQTT Discovery configs", len(old_topics))
+            await self._publish_retained((topic, DISCOVERY_MIGRATE) for topic in old_topics)
+        await self._publish_retained(self._discovery)
+        if old_topics:
+            await self._publish_retained((topic, b"") for topic in old_topics)
         log.info("Published MQTT Discovery configs")
 
+    async def _publish_retained(self, messages):
+        """Publish (topic, payload) pairs retained, concurrently."""
+        await asyncio.gather(
+            *(self._client.publish(topic, payload, qos=1, retain=True) for topic, payload in messages)
+        )
+
+    async def _retained_topics(self, topics: tuple[str, ...]) -> list[str]:
+        """Return the given topics that currently hold a retained, non-empty message."""
+        client = self._client
+        await client.subscribe([(topic, 1) for topic in topics])
+        found = []
+        try:
+            # The broker sends retained messages right after the SUBACK
+            while True:
+                message = await asyncio.wait_for(anext(client.messages), RETAINED_PROBE_TIMEOUT)
+                topic = message.topic.value
+                if message.retain and message.payload and topic in topics and topic not in found:
+                    found.append(topic)
+        except asyncio.TimeoutError:
+            pass
+        await client.unsubscribe(list(topics))
+        return found
+
+    def _build_discovery(self) -> tuple[tuple[str, ...], tuple[tuple[str, bytes], ...]]:
+        """Build the other schema's topics and our Discovery (topic, payload) pairs from the config."""
+        availability_topic = f"{BASE_TOPIC}/availability"
+        uid_prefix = f"easywallbox_{self._config.wallbox_address}_"
+        node_id = self._config.wallbox_address.replace(":", "").lower()
+        device_topic = f"homeassistant/device/easywallbox_{node_id}/config"
+        legacy_topics = [
+            f"homeassistant/{component}/easywallbox/{object_id}/config"
+            for component, object_id, _ in DISCOVERY_ENTITIES
+        ]
+        
+        if self._config.legacy_discovery:
+            # One retained config per entity, each carrying the device info
+            common = {
+                "device": self._device_info,
+                "availability_topic": availability_topic,
+            }
+            old_topics = (device_topic,)
+            configs = tuple(
+                (
+                    topic,
+                    json.dumps(
+                        {**config, "unique_id": uid_prefix + object_id, **common},
+                        separators=(",", ":"),
+                    ).encode(),
+                )
+                for topic, (_, object_id, config) in zip(legacy_topics, DISCOVERY_ENTITIES)
+            )
+        else:
+            # Device-based discovery: all entities in one retained config, sharing
+            # the device and availability blocks
+            device_config = {
+                "device": self._device_info,
+                "origin": {"name": "easywallbox"},
+                "availability_topic": availability_topic,
+                "components": {
+                    object_id: {"platform": component, **config, "unique_id": uid_prefix + object_id}
+                    for component, object_id, config in DISCOVERY_ENTITIES
+                },
+            }
+            old_topics = tuple(legacy_topics)
+            configs = ((device_topic, json.dumps(device_config, separators=(",", ":")).encode()),)
+        
+        return old_topics, configs
 
-    async def publish(self, subtopic: str, payload: str):
+    async def publish(self, subtopic: str, payload: str, qos: int = 0, retain: bool = False):
         """Publish a message to MQTT."""
         if self._client:
-            full_topic = f"easywallbox/{subtopic}"
+            full_topic = self._topics.get(subtopic)
+            if full_topic is None:
+                full_topic = self._topics[subtopic] = f"{BASE_TOPIC}/{subtopic}"
             try:
-                await self._client.publish(full_topic, payload)
-                log.debug(f"Published to {full_topic}: {payload}")
+                await self._client.publish(full_topic, payload, qos=qos, retain=retain)
+                log.debug("Published to %s: %s", full_topic, payload)
             except Exception as e:
-                log.error(f"Failed to publish to {full_topic}: {e}")
+                log.error("Failed to publish to %s: %s", full_topic, e)
         else:
             log.warning("Cannot publish: MQTT client not connected")
 
     def stop(self):
         """Stop the MQTT loop."""
         self._running = False
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None